@@ -2,9 +2,11 @@
 エージェントファクトリ
 設定からエージェントを動的生成（YAML読み込み版）
 """
-from openai import OpenAI
-from typing import List, Dict, Any, Optional
-import json
+from openai import OpenAI, AsyncOpenAI
+from typing import List, Dict, Any, Optional, Tuple
+from functools import partial
+import anyio.to_thread
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
@@ -65,7 +67,8 @@ class AgentFactory:
             temperature=llm_config.get('temperature', 0.7),
             max_tokens=llm_config.get('max_tokens', 4000),
             tools=tools or [],
-            tool_functions=tool_functions or {}
+            tool_functions=tool_functions or {},
+            prompt_cache_key=self.domain_config['domain']['id']
         )
         
         logger.info(f"Created agent: {agent_name}")
@@ -124,7 +127,8 @@ class DynamicAgent:
         temperature: float = 0.7,
         max_tokens: int = 4000,
         tools: List[Dict] = None,
-        tool_functions: Dict = None
+        tool_functions: Dict = None,
+        prompt_cache_key: Optional[str] = None
     ):
         """初期化"""
         self.name = name
@@ -135,12 +139,18 @@ class DynamicAgent:
         self.tools = tools or []
         self.tool_functions = tool_functions or {}
         
+        # プロンプトキャッシュのルーティングキー
+        # （システムプロンプトは起動時に確定し全ターン共通のため、同じキーで送ることで
+        #   プロバイダ側のプレフィックスキャッシュにヒットしやすくする）
+        self.prompt_cache_key = prompt_cache_key
+        
         # OpenAI クライアント
         if not api_key:
             logger.error("OPENAI_API_KEY is not set!")
             raise ValueError("OPENAI_API_KEY is required")
         
         self.client = OpenAI(api_key=api_key)
+        self.async_client = AsyncOpenAI(api_key=api_key)
         
         logger.info(f"DynamicAgent '{name}' initialized with model: {model}")
     
@@ -155,41 +165,32 @@ class DynamicAgent:
         Returns:
             レスポンス辞書
         """
-        logger.info(f"Chat started: {user_message[:50]}...")
-        
-        # メッセージ構築
-        messages = [{"role": "system", "content": self.instructions}]
-        
-        if conversation_history:
-            messages.extend(conversation_history)
+        logger.info("Chat started: %s...", user_message[:50])
         
-        messages.append({"role": "user", "content": user_message})
+        messages = self._build_messages(user_message, conversation_history)
         
         # OpenAI API呼び出し
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=self.tools if self.tools else None,
-                tool_choice="auto" if self.tools else None,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
+                **self._completion_params(messages, use_tools=True)
             )
             
             assistant_message = response.choices[0].message
             
             # ツール呼び出しチェック
             if assistant_message.tool_calls:
-                logger.info(f"Tool calls detected: {len(assistant_message.tool_calls)}")
+                logger.info("Tool calls detected: %s", len(assistant_message.tool_calls))
                 
                 # ツール実行
                 messages.append(assistant_message)
+                executed_calls = []
                 
                 for tool_call in assistant_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    logger.info(f"Calling tool: {function_name} with args: {function_args}")
+                    function_name, function_args = self._parse_tool_call(tool_call)
+                    executed_calls.append({
+                        "function": function_name,
+                        "arguments": function_args
+                    })
                     
                     # ツール実行
                     if function_name in self.tool_functions:
@@ -197,49 +198,152 @@ class DynamicAgent:
                     else:
                         function_response = {"error": f"Unknown function: {function_name}"}
                     
+                    # ツールがエラーを返した場合は記録（エラーを含む応答はキャッシュしない）
+                    if isinstance(function_response, dict) and "error" in function_response:
+                        executed_calls[-1]["error"] = function_response["error"]
+                    
                     # ツール結果をメッセージに追加
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": function_name,
-                        "content": json.dumps(function_response, ensure_ascii=False)
-                    })
+                    messages.append(self._tool_message(tool_call, function_name, function_response))
                 
                 # ツール結果を含めて再度API呼び出し
                 second_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens
+                    **self._completion_params(messages, use_tools=False)
                 )
                 
-                final_message = second_response.choices[0].message.content
-                
-                return {
-                    "response": final_message,
-                    "tool_calls": [
-                        {
-                            "function": tc.function.name,
-                            "arguments": json.loads(tc.function.arguments)
-                        }
-                        for tc in assistant_message.tool_calls
-                    ],
-                    "usage": second_response.usage.model_dump() if second_response.usage else None
-                }
+                return self._build_result(second_response, executed_calls)
             
             else:
                 # ツール呼び出しなし
                 logger.info("No tool calls, returning direct response")
-                return {
-                    "response": assistant_message.content,
-                    "tool_calls": [],
-                    "usage": response.usage.model_dump() if response.usage else None
-                }
+                return self._build_result(response, [])
         
         except Exception as e:
-            logger.error(f"Chat error: {e}")
+            logger.error("Chat error: %s", e)
             raise
-
+    
+    async def chat_async(self, user_message: str, conversation_history: Optional[List[Dict]] = None) -> Dict[str, Any]:
+        """
+        チャット実行（非同期版）
+        
+        LLM呼び出しは AsyncOpenAI で待機し、同期ツール関数（DBアクセス等）は
+        スレッドプールで実行するため、イベントループをブロックしない。
+        
+        Args:
+            user_message: ユーザーメッセージ
+            conversation_history: 会話履歴
+        
+        Returns:
+            レスポンス辞書（chat() と同じ形式）
+        """
+        logger.info("Chat started: %s...", user_message[:50])
+        
+        messages = self._build_messages(user_message, conversation_history)
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                **self._completion_params(messages, use_tools=True)
+            )
+            
+            assistant_message = response.choices[0].message
+            
+            if not assistant_message.tool_calls:
+                logger.info("No tool calls, returning direct response")
+                return self._build_result(response, [])
+            
+            logger.info("Tool calls detected: %s", len(assistant_message.tool_calls))
+            
+            messages.append(assistant_message)
+            executed_calls = []
+            
+            for tool_call in assistant_message.tool_calls:
+                function_name, function_args = self._parse_tool_call(tool_call)
+                executed_calls.append({
+                    "function": function_name,
+                    "arguments": function_args
+                })
+                
+                if function_name in self.tool_functions:
+                    function_response = await anyio.to_thread.run_sync(
+                        partial(self.tool_functions[function_name], **function_args)
+                    )
+                else:
+                    function_response = {"error": f"Unknown function: {function_name}"}
+                
+                if isinstance(function_response, dict) and "error" in function_response:
+                    executed_calls[-1]["error"] = function_response["error"]
+                
+                messages.append(self._tool_message(tool_call, function_name, function_response))
+            
+            second_response = await self.async_client.chat.completions.create(
+                **self._completion_params(messages, use_tools=False)
+            )
+            
+            return self._build_result(second_response, executed_calls)
+        
+        except Exception as e:
+            logger.error("Chat error: %s", e)
+            raise
+    
+    def _build_messages(self, user_message: str, conversation_history: Optional[List[Dict]]) -> List[Any]:
+        """メッセージ構築"""
+        messages = [{"role": "system", "content": self.instructions}]
+        
+        if conversation_history:
+            messages.extend(conversation_history)
+        
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _completion_params(self, messages: List[Any], use_tools: bool) -> Dict[str, Any]:
+        """chat.completions.create 用パラメータ"""
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+        
+        if use_tools:
+            params["tools"] = self.tools if self.tools else None
+            params["tool_choice"] = "auto" if self.tools else None
+        
+        if self.prompt_cache_key:
+            params["extra_body"] = {"prompt_cache_key": self.prompt_cache_key}
+        
+        return params
+    
+    @staticmethod
+    def _parse_tool_call(tool_call) -> Tuple[str, Dict[str, Any]]:
+        """ツール呼び出しから関数名と引数を取得"""
+        function_name = tool_call.function.name
+        function_args = orjson.loads(tool_call.function.arguments)
+        
+        logger.info("Calling tool: %s with args: %s", function_name, function_args)
+        return function_name, function_args
+    
+    @staticmethod
+    def _tool_message(tool_call, function_name: str, function_response: Any) -> Dict[str, Any]:
+        """ツール結果メッセージ生成"""
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "name": function_name,
+            "content": orjson.dumps(function_response).decode()
+        }
+    
+    @staticmethod
+    def _build_result(response, tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """レスポンス辞書生成"""
+        usage = response.usage
+        details = getattr(usage, 'prompt_tokens_details', None) if usage else None
+        if details is not None:
+            logger.info("Prompt tokens: %s (cached: %s)", usage.prompt_tokens, details.cached_tokens or 0)
+        
+        return {
+            "response": response.choices[0].message.content,
+            "tool_calls": tool_calls,
+            "usage": usage.model_dump() if usage else None
+        }
 
 # 使用例:
 # from app.core.agent_factory import AgentFactory
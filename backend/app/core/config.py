@@ -10,6 +10,12 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from pydantic_settings import BaseSettings
 
+# libyaml（Cバインディング）が使える場合は高速なローダーを使用
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 class AppSettings(BaseSettings):
     """環境変数設定"""
     
@@ -45,7 +51,7 @@ class ConfigLoader:
             raise FileNotFoundError(f"Config file not found: {filepath}")
         
         with open(filepath, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=SafeLoader)
         
         # 環境変数展開
         config = self._expand_env_vars(config)
@@ -152,7 +158,7 @@ class ConfigLoader:
             return {}
         
         with open(prompts_file, 'r', encoding='utf-8') as f:
-            prompts = yaml.safe_load(f)
+            prompts = yaml.load(f, Loader=SafeLoader)
         
         return prompts if prompts else {}
     
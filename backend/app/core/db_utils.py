@@ -4,8 +4,11 @@
 ドメインごとにスキーマを分離してデータを管理
 """
 import os
+import threading
+from contextlib import contextmanager
 import psycopg2
-from typing import Optional
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from typing import Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,6 +57,42 @@ def get_db_connection(schema: Optional[str] = None):
         raise
 
 
+def _resolve_domain_schema() -> Optional[str]:
+    """
+    アクティブドメインのスキーマ名を判定
+    
+    Returns:
+        スキーマ名（スキーマ分離なしの場合はNone = public）
+    """
+    from app.core.config import config_loader
+    
+    # アクティブドメイン取得
+    domain_config = config_loader.get_active_domain_config()
+    domain_name = domain_config['domain']['name']
+    
+    # データベース設定確認
+    db_config = domain_config.get('database', {})
+    
+    # スキーマ分離を使用するか確認
+    use_schema = db_config.get('use_schema_separation', True)
+    
+    if not use_schema:
+        logger.debug("Domain '%s': Using public schema (schema separation disabled)", domain_name)
+        return None
+    
+    # スキーマ名取得
+    if 'schema' in db_config:
+        # 明示的に指定されたスキーマ名
+        schema = db_config['schema']
+    else:
+        # ドメインIDからスキーマ名を自動生成
+        domain_id = domain_config['domain']['id']
+        schema = domain_id.replace('-', '_')
+    
+    logger.debug("Domain '%s': Using schema '%s'", domain_name, schema)
+    return schema
+
+
 def get_db_connection_for_domain():
     """
     現在のアクティブドメイン用のDB接続取得
@@ -65,33 +104,7 @@ def get_db_connection_for_domain():
         psycopg2接続オブジェクト
     """
     try:
-        from app.core.config import config_loader
-        
-        # アクティブドメイン取得
-        domain_config = config_loader.get_active_domain_config()
-        domain_name = domain_config['domain']['name']
-        
-        # データベース設定確認
-        db_config = domain_config.get('database', {})
-        
-        # スキーマ分離を使用するか確認
-        use_schema = db_config.get('use_schema_separation', True)
-        
-        if not use_schema:
-            logger.info(f"Domain '{domain_name}': Using public schema (schema separation disabled)")
-            return get_db_connection()
-        
-        # スキーマ名取得
-        if 'schema' in db_config:
-            # 明示的に指定されたスキーマ名
-            schema = db_config['schema']
-        else:
-            # ドメインIDからスキーマ名を自動生成
-            domain_id = domain_config['domain']['id']
-            schema = domain_id.replace('-', '_')
-        
-        logger.info(f"Domain '{domain_name}': Using schema '{schema}'")
-        return get_db_connection(schema=schema)
+        return get_db_connection(schema=_resolve_domain_schema())
     
     except ImportError:
         logger.warning("config_loader not available, using default connection (public schema)")
@@ -103,6 +116,183 @@ def get_db_connection_for_domain():
         return get_db_connection()
 
 
+# ========================================
+# コネクションプール
+# ========================================
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """
+    スレッドセーフなコネクションプール
+    
+    ThreadedConnectionPool は上限到達時に PoolError を送出するため、
+    空きが出るまで待機するようにしたもの。
+    timeout 秒待っても空かない場合（接続リーク等）は PoolError を送出する。
+    
+    セマフォは getconn で貸し出した接続ごとに1回だけ解放する。
+    putconn が失敗しても解放し（枠のリークを防ぐ）、
+    貸し出していない接続の二重返却では解放しない。
+    """
+    
+    def __init__(self, minconn: int, maxconn: int, *args, timeout: Optional[float] = None, **kwargs):
+        self._semaphore = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+        self._checked_out = set()
+        self._checked_out_lock = threading.Lock()
+        super().__init__(minconn, maxconn, *args, **kwargs)
+    
+    def getconn(self, key=None):
+        if not self._semaphore.acquire(timeout=self._timeout):
+            raise PoolError(
+                f"connection pool exhausted: no connection released within {self._timeout}s "
+                f"(maxconn={self.maxconn})"
+            )
+        try:
+            conn = super().getconn(key)
+        except Exception:
+            self._semaphore.release()
+            raise
+        
+        with self._checked_out_lock:
+            self._checked_out.add(id(conn))
+        return conn
+    
+    def putconn(self, conn=None, key=None, close=False):
+        with self._checked_out_lock:
+            checked_out = id(conn) in self._checked_out
+            self._checked_out.discard(id(conn))
+        
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            if checked_out:
+                self._semaphore.release()
+
+
+_pools: Dict[Optional[str], BlockingConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+# アクティブドメイン用プール（スキーマ判定は初回のみ）
+_domain_pool: Optional[BlockingConnectionPool] = None
+
+
+def get_pool_settings() -> Tuple[int, float]:
+    """
+    app.config.yaml の database.pool_size / database.pool_timeout を取得
+    
+    Raises:
+        ValueError: pool_size が1以上の整数でない、または pool_timeout が0以上の数値でない場合
+    """
+    from app.core.config import config_loader
+    db_config = config_loader.load_app_config().get('database', {})
+    
+    pool_size = db_config.get('pool_size', 10)
+    if isinstance(pool_size, bool) or not isinstance(pool_size, int) or pool_size < 1:
+        raise ValueError(f"database.pool_size must be an integer >= 1: {pool_size!r}")
+    
+    pool_timeout = db_config.get('pool_timeout', 30)
+    if isinstance(pool_timeout, bool) or not isinstance(pool_timeout, (int, float)) or pool_timeout < 0:
+        raise ValueError(f"database.pool_timeout must be a number >= 0: {pool_timeout!r}")
+    
+    return pool_size, float(pool_timeout)
+
+
+def get_connection_pool(schema: Optional[str] = None) -> BlockingConnectionPool:
+    """
+    スキーマ別のコネクションプール取得（初回呼び出し時に生成）
+    
+    search_path は接続オプションで設定するため、
+    接続取得ごとの SET search_path は不要。
+    
+    Args:
+        schema: PostgreSQLスキーマ名（指定しない場合はpublic）
+    
+    Returns:
+        BlockingConnectionPoolインスタンス
+    """
+    pool = _pools.get(schema)
+    if pool is not None:
+        return pool
+    
+    with _pools_lock:
+        pool = _pools.get(schema)
+        if pool is None:
+            kwargs = {}
+            if schema:
+                # スキーマ設定（フォールバックでpublicも検索パスに含める）
+                kwargs['options'] = f"-c search_path={schema},public"
+            
+            pool_size, pool_timeout = get_pool_settings()
+            pool = BlockingConnectionPool(1, pool_size, DATABASE_URL, timeout=pool_timeout, **kwargs)
+            _pools[schema] = pool
+            logger.info("Connection pool created: schema=%s, size=%s, timeout=%ss",
+                        schema or 'public', pool_size, pool_timeout)
+    
+    return pool
+
+
+def get_domain_connection_pool() -> BlockingConnectionPool:
+    """
+    アクティブドメイン用のコネクションプール取得
+    
+    スキーマ判定（ドメイン設定の参照）は初回のみ行い、以降は同じプールを返す。
+    """
+    global _domain_pool
+    
+    pool = _domain_pool
+    if pool is not None:
+        return pool
+    
+    try:
+        schema = _resolve_domain_schema()
+    except Exception as e:
+        logger.error("Failed to resolve domain schema: %s", e)
+        logger.warning("Falling back to public schema")
+        schema = None
+    
+    pool = get_connection_pool(schema)
+    _domain_pool = pool
+    return pool
+
+
+@contextmanager
+def domain_connection():
+    """
+    アクティブドメイン用のプール接続を取得するコンテキストマネージャ
+    
+    Example:
+        with domain_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ...")
+    """
+    pool = get_domain_connection_pool()
+    conn = pool.getconn()
+    broken = False
+    
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        # 切断された接続はプールに戻さず破棄
+        broken = True
+        raise
+    finally:
+        # 返却の失敗で元の例外を隠さない
+        try:
+            pool.putconn(conn, close=broken or bool(conn.closed))
+        except Exception as e:
+            logger.error("Failed to return connection to pool: %s", e)
+
+
+def close_connection_pools():
+    """全コネクションプールをクローズ"""
+    global _domain_pool
+    
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+        _domain_pool = None
+
+
 def get_db():
     """
     後方互換性のためのエイリアス
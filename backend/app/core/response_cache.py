@@ -0,0 +1,130 @@
+"""
+LLMレスポンスキャッシュ（プロセス内）
+
+同一の指示文・会話履歴・質問に対する応答を再利用し、
+LLM呼び出しのレイテンシとトークンコストを削減する
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    完全一致キャッシュ（LRU + TTL）
+    
+    イベントループ上からのみ使用する前提のため、ロックは持たない。
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl: int = 300):
+        """
+        初期化
+        
+        Args:
+            max_entries: 最大保持件数（0でキャッシュ無効）
+            ttl: 有効期限（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # 指示文（システムプロンプト）ごとのハッシュ途中状態（リクエストごとに全文を再ハッシュしない）
+        self._instruction_hashes: Dict[str, Any] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+    
+    def make_key(self, instructions: str, query: str, history: Optional[List[Dict]] = None) -> str:
+        """キャッシュキー生成（sha256）"""
+        base = self._instruction_hashes.get(instructions)
+        if base is None:
+            base = hashlib.sha256(instructions.encode())
+            base.update(b"\x00")
+            self._instruction_hashes[instructions] = base
+        
+        h = base.copy()
+        if history:
+            h.update(orjson.dumps(history))
+        h.update(b"\x00")
+        h.update(query.encode())
+        return h.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュ取得（期限切れは削除してNone）
+        
+        LLMを呼び出していないため、返す結果の usage は None にする。
+        """
+        if not self.enabled:
+            return None
+        
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return {**result, "usage": None}
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        """キャッシュ登録（上限超過時は最も古いものから削除）"""
+        if not self.enabled:
+            return
+        
+        # ツールがエラーを返した応答（DB障害時など）は再利用しない
+        if any("error" in call for call in result.get('tool_calls') or ()):
+            return
+        
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        """キャッシュクリア"""
+        self._entries.clear()
+
+
+def _non_negative_int(config: Dict[str, Any], key: str, default: int) -> int:
+    """設定値を0以上の整数に変換（不正な値は警告してデフォルト値を使用）"""
+    value = config.get(key, default)
+    try:
+        result = int(value)
+    except (TypeError, ValueError):
+        result = -1
+    
+    if isinstance(value, bool) or result < 0:
+        logger.warning("Invalid response_cache.%s: %r (using %s)", key, value, default)
+        return default
+    return result
+
+
+def create_response_cache(app_config: Dict[str, Any]) -> ResponseCache:
+    """
+    app.config.yaml の response_cache セクションからキャッシュ生成
+    
+    Args:
+        app_config: アプリケーション設定
+    
+    Returns:
+        ResponseCacheインスタンス
+    """
+    cache_config = app_config.get('response_cache') or {}
+    cache = ResponseCache(
+        max_entries=_non_negative_int(cache_config, 'max_entries', 10000),
+        ttl=_non_negative_int(cache_config, 'ttl', 300)
+    )
+    
+    logger.info("Response cache: max_entries=%s, ttl=%s", cache.max_entries, cache.ttl)
+    return cache
@@ -3,9 +3,12 @@
 """
 from typing import Dict, List, Any
 import logging
+import traceback
+
+from psycopg2.extras import RealDictCursor
 
 # 汎用DB接続ユーティリティをインポート
-from app.core.db_utils import get_db_connection_for_domain
+from app.core.db_utils import domain_connection
 
 logger = logging.getLogger(__name__)
 
@@ -21,83 +24,66 @@ def get_race_statistics(race_name: str, category: str) -> Dict[str, Any]:
     Returns:
         統計データ
     """
-    logger.info(f"get_race_statistics called: race_name={race_name}, category={category}")
+    logger.info("get_race_statistics called: race_name=%s, category=%s", race_name, category)
     
     try:
-        # 汎用DB接続関数を使用（自動的にドメインのスキーマを使用）
-        conn = get_db_connection_for_domain()
-        cursor = conn.cursor()
-        
-        # 脚質統計はリアルタイム計算
-        if category == "running_style":
-            result = _get_running_style_stats_dynamic(cursor, race_name)
-            conn.close()
-            return result
-        
-        # それ以外（人気・枠順）はDB格納済み統計を取得
-        cursor.execute("""
-            SELECT 
-                condition,
-                total_runs,
-                wins,
-                seconds,
-                places,
-                win_rate,
-                place_rate,
-                show_rate,
-                years_analyzed
-            FROM race_statistics
-            WHERE race_name = %s AND category = %s
-            ORDER BY 
-                CASE 
-                    WHEN %s = 'popularity' THEN 
-                        CASE condition
-                            WHEN '1番人気' THEN 1
-                            WHEN '2番人気' THEN 2
-                            WHEN '3番人気' THEN 3
-                            WHEN '4-6番人気' THEN 4
-                            WHEN '7-9番人気' THEN 5
-                            WHEN '10番人気以下' THEN 6
-                            ELSE 99
-                        END
-                    WHEN %s = 'post_position' THEN 
-                        CASE 
-                            WHEN condition ~ '^[0-9]+枠$' THEN 
-                                CAST(SUBSTRING(condition FROM '^([0-9]+)') AS INTEGER)
-                            ELSE 99
-                        END
-                    ELSE 99
-                END
-        """, (race_name, category, category, category))
-        
-        rows = cursor.fetchall()
+        # プール接続を使用（自動的にドメインのスキーマを使用）
+        with domain_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            # 脚質統計はリアルタイム計算
+            if category == "running_style":
+                return _get_running_style_stats_dynamic(cursor, race_name)
+            
+            # それ以外（人気・枠順）はDB格納済み統計を取得
+            cursor.execute("""
+                SELECT 
+                    condition,
+                    total_runs,
+                    wins,
+                    seconds,
+                    places,
+                    COALESCE(win_rate, 0)::float AS win_rate,
+                    COALESCE(place_rate, 0)::float AS place_rate,
+                    COALESCE(show_rate, 0)::float AS show_rate,
+                    total_runs AS sample_size,
+                    years_analyzed
+                FROM race_statistics
+                WHERE race_name = %s AND category = %s
+                ORDER BY 
+                    CASE 
+                        WHEN %s = 'popularity' THEN 
+                            CASE condition
+                                WHEN '1番人気' THEN 1
+                                WHEN '2番人気' THEN 2
+                                WHEN '3番人気' THEN 3
+                                WHEN '4-6番人気' THEN 4
+                                WHEN '7-9番人気' THEN 5
+                                WHEN '10番人気以下' THEN 6
+                                ELSE 99
+                            END
+                        WHEN %s = 'post_position' THEN 
+                            CASE 
+                                WHEN condition ~ '^[0-9]+枠$' THEN 
+                                    CAST(SUBSTRING(condition FROM '^([0-9]+)') AS INTEGER)
+                                ELSE 99
+                            END
+                        ELSE 99
+                    END
+            """, (race_name, category, category, category))
+            
+            rows = cursor.fetchall()
         
         if not rows:
-            conn.close()
             return {
                 "error": f"レース '{race_name}' のカテゴリ '{category}' のデータが見つかりません",
                 "race_name": race_name,
                 "category": category
             }
         
-        # データ整形
-        data = []
-        for row in rows:
-            data.append({
-                "condition": row[0],
-                "total_runs": row[1],
-                "wins": row[2],
-                "seconds": row[3],
-                "places": row[4],
-                "win_rate": float(row[5]) if row[5] else 0,
-                "place_rate": float(row[6]) if row[6] else 0,
-                "show_rate": float(row[7]) if row[7] else 0,
-                "sample_size": row[1]
-            })
-        
-        years_analyzed = rows[0][8] if rows else 10
-        
-        conn.close()
+        # データ整形（列名・型はSQL側で確定済み）
+        years_analyzed = rows[0]['years_analyzed']
+        data = [{k: v for k, v in row.items() if k != 'years_analyzed'} for row in rows]
         
         result = {
             "race_name": race_name,
@@ -108,12 +94,11 @@ def get_race_statistics(race_name: str, category: str) -> Dict[str, Any]:
             "note": "競馬ラボから取得した統計データです"
         }
         
-        logger.info(f"Returning {len(data)} records for {race_name}/{category}")
+        logger.info("Returning %s records for %s/%s", len(data), race_name, category)
         return result
         
     except Exception as e:
-        logger.error(f"Database error: {e}")
-        import traceback
+        logger.error("Database error: %s", e)
         logger.error(traceback.format_exc())
         return {
             "error": f"データベースエラー: {str(e)}",
@@ -127,21 +112,18 @@ def _get_running_style_stats_dynamic(cursor, race_name: str) -> Dict[str, Any]:
     # ... 既存の実装そのまま ...
     cursor.execute("""
         SELECT 
-            estimated_running_style as condition,
+            rr.estimated_running_style as condition,
             COUNT(*) as total_runs,
             SUM(CASE WHEN finish_position = 1 THEN 1 ELSE 0 END) as wins,
             SUM(CASE WHEN finish_position <= 3 THEN 1 ELSE 0 END) as top3
         FROM race_results rr
         JOIN races r ON rr.race_id = r.race_id
-        WHERE r.race_name = %s 
-          AND estimated_running_style IS NOT NULL
-        GROUP BY estimated_running_style
-        ORDER BY CASE estimated_running_style
-            WHEN '逃げ' THEN 1
-            WHEN '先行' THEN 2
-            WHEN '差し' THEN 3
-            WHEN '追込' THEN 4
-        END
+        LEFT JOIN bucket_defs b
+          ON b.kind = 'running_style' AND b.condition = rr.estimated_running_style
+        WHERE r.race_name = %s
+          AND rr.estimated_running_style IS NOT NULL
+        GROUP BY rr.estimated_running_style
+        ORDER BY COALESCE(MIN(b.sort_key), 99), rr.estimated_running_style
     """, (race_name,))
     
     rows = cursor.fetchall()
@@ -158,7 +140,7 @@ def _get_running_style_stats_dynamic(cursor, race_name: str) -> Dict[str, Any]:
     total_horses = 0
     
     for row in rows:
-        condition, total_runs, wins, top3 = row
+        condition, total_runs, wins, top3 = row['condition'], row['total_runs'], row['wins'], row['top3']
         total_horses += total_runs
         win_rate = round(wins / total_runs * 100, 1) if total_runs > 0 else 0
         
@@ -198,81 +180,64 @@ def _get_running_style_stats_dynamic(cursor, race_name: str) -> Dict[str, Any]:
 
 def analyze_elimination_conditions(race_name: str) -> Dict[str, Any]:
     """消去法データ分析"""
-    logger.info(f"analyze_elimination_conditions called: race_name={race_name}")
+    logger.info("analyze_elimination_conditions called: race_name=%s", race_name)
     
     try:
-        # 汎用DB接続関数を使用
-        conn = get_db_connection_for_domain()
-        cursor = conn.cursor()
-        
-        # ... 既存の実装そのまま（前走人気別・前走着順別） ...
-        
-        # 前走人気別成績
-        cursor.execute("""
-            SELECT 
-                CASE 
-                    WHEN previous_popularity = 1 THEN '前走1番人気'
-                    WHEN previous_popularity BETWEEN 2 AND 3 THEN '前走2-3番人気'
-                    WHEN previous_popularity BETWEEN 4 AND 6 THEN '前走4-6番人気'
-                    ELSE '前走7番人気以下'
-                END as condition,
-                COUNT(*) as total,
-                SUM(CASE WHEN finish_position = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN finish_position <= 3 THEN 1 ELSE 0 END) as top3
-            FROM race_results rr
-            JOIN races r ON rr.race_id = r.race_id
-            WHERE r.race_name = %s AND previous_popularity IS NOT NULL
-            GROUP BY condition
-            ORDER BY 
-                MIN(CASE 
-                    WHEN previous_popularity = 1 THEN 1
-                    WHEN previous_popularity BETWEEN 2 AND 3 THEN 2
-                    WHEN previous_popularity BETWEEN 4 AND 6 THEN 3
-                    ELSE 4
-                END)
-        """, (race_name,))
-        
-        previous_popularity_data = []
-        for row in cursor.fetchall():
-            condition, total, wins, top3 = row
-            previous_popularity_data.append({
-                "condition": condition,
-                "total": total,
-                "wins": wins,
-                "win_rate": round(wins / total * 100, 1) if total > 0 else 0,
-                "place_rate": round(top3 / total * 100, 1) if total > 0 else 0,
-                "sample_size": total
-            })
-        
-        # 前走着順別成績
-        cursor.execute("""
-            SELECT 
-                CASE 
-                    WHEN previous_finish_position = 1 THEN '前走勝利'
-                    WHEN previous_finish_position BETWEEN 2 AND 3 THEN '前走2-3着'
-                    WHEN previous_finish_position BETWEEN 4 AND 6 THEN '前走4-6着'
-                    ELSE '前走7着以下'
-                END as condition,
-                COUNT(*) as total,
-                SUM(CASE WHEN finish_position = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN finish_position <= 3 THEN 1 ELSE 0 END) as top3
-            FROM race_results rr
-            JOIN races r ON rr.race_id = r.race_id
-            WHERE r.race_name = %s AND previous_finish_position IS NOT NULL
-            GROUP BY condition
-            ORDER BY 
-                MIN(CASE 
-                    WHEN previous_finish_position = 1 THEN 1
-                    WHEN previous_finish_position BETWEEN 2 AND 3 THEN 2
-                    WHEN previous_finish_position BETWEEN 4 AND 6 THEN 3
-                    ELSE 4
-                END)
-        """, (race_name,))
+        # プール接続を使用
+        with domain_connection() as conn:
+            cursor = conn.cursor()
+            
+            # 前走人気別・前走着順別成績（1回のクエリで取得）
+            cursor.execute("""
+                WITH j AS (
+                    SELECT rr.previous_popularity, rr.previous_finish_position, rr.finish_position
+                    FROM race_results rr
+                    JOIN races r ON rr.race_id = r.race_id
+                    WHERE r.race_name = %s
+                ),
+                bucketed AS (
+                    SELECT
+                        'prev_pop' AS kind,
+                        CASE 
+                            WHEN previous_popularity = 1 THEN '前走1番人気'
+                            WHEN previous_popularity BETWEEN 2 AND 3 THEN '前走2-3番人気'
+                            WHEN previous_popularity BETWEEN 4 AND 6 THEN '前走4-6番人気'
+                            ELSE '前走7番人気以下'
+                        END AS condition,
+                        finish_position
+                    FROM j
+                    WHERE previous_popularity IS NOT NULL
+                    UNION ALL
+                    SELECT
+                        'prev_finish' AS kind,
+                        CASE 
+                            WHEN previous_finish_position = 1 THEN '前走勝利'
+                            WHEN previous_finish_position BETWEEN 2 AND 3 THEN '前走2-3着'
+                            WHEN previous_finish_position BETWEEN 4 AND 6 THEN '前走4-6着'
+                            ELSE '前走7着以下'
+                        END AS condition,
+                        finish_position
+                    FROM j
+                    WHERE previous_finish_position IS NOT NULL
+                )
+                SELECT 
+                    x.kind,
+                    x.condition,
+                    COUNT(*) as total,
+                    SUM(CASE WHEN finish_position = 1 THEN 1 ELSE 0 END) as wins,
+                    SUM(CASE WHEN finish_position <= 3 THEN 1 ELSE 0 END) as top3
+                FROM bucketed x
+                LEFT JOIN bucket_defs b ON b.kind = x.kind AND b.condition = x.condition
+                GROUP BY x.kind, x.condition
+                ORDER BY x.kind, COALESCE(MIN(b.sort_key), 99), x.condition
+            """, (race_name,))
+            
+            rows = cursor.fetchall()
         
-        previous_finish_data = []
-        for row in cursor.fetchall():
-            condition, total, wins, top3 = row
-            previous_finish_data.append({
+        elimination_rows = {'prev_pop': [], 'prev_finish': []}
+        for row in rows:
+            kind, condition, total, wins, top3 = row
+            elimination_rows[kind].append({
                 "condition": condition,
                 "total": total,
                 "wins": wins,
@@ -281,7 +246,8 @@ def analyze_elimination_conditions(race_name: str) -> Dict[str, Any]:
                 "sample_size": total
             })
         
-        conn.close()
+        previous_popularity_data = elimination_rows['prev_pop']
+        previous_finish_data = elimination_rows['prev_finish']
         
         # 重要条件抽出
         key_conditions = []
@@ -303,8 +269,7 @@ def analyze_elimination_conditions(race_name: str) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        logger.error(f"Database error: {e}")
-        import traceback
+        logger.error("Database error: %s", e)
         logger.error(traceback.format_exc())
         return {
             "error": f"データベースエラー: {str(e)}",
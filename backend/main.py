@@ -4,13 +4,19 @@ AgentFactory + ToolLoader を使用した動的エージェント生成
 """
 from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
+import anyio.to_thread
 import logging
+import time
+import traceback
 from datetime import datetime
-import json
+import orjson
 
 from app.core.config import app_settings, config_loader
 from app.core.agent_factory import AgentFactory
 from app.core.tool_loader import ToolLoader
+from app.core.db_utils import close_connection_pools, get_pool_settings
+from app.core.response_cache import create_response_cache
 
 # ロギング設定
 logging.basicConfig(
@@ -27,16 +33,41 @@ domain_config = config_loader.get_active_domain_config()
 app = FastAPI(
     title=domain_config['domain']['name'],
     version=domain_config['domain']['version'],
-    description=domain_config['domain']['description']
+    description=domain_config['domain']['description'],
+    default_response_class=ORJSONResponse
 )
 
 # CORS設定
+cors_config = app_config.get('cors', {})
+
+
+def _cors_list(key: str, default: list) -> list:
+    """cors設定の文字列リストを取得（単一文字列等は起動時にエラー）"""
+    value = cors_config.get(key, default)
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"cors.{key} must be a list of strings: {value!r}")
+    return value
+
+
+cors_origins = _cors_list('allow_origins', ["*"])
+cors_methods = _cors_list('allow_methods', ["GET", "POST", "OPTIONS"])
+cors_headers = _cors_list('allow_headers', ["Content-Type"])
+
+if "*" in cors_origins:
+    # 全て許可（開発環境）: 認証情報なしなら固定ヘッダーを返すだけで済む
+    cors_origins = ["*"]
+    cors_credentials = False
+else:
+    # 許可リストはsetで保持し、リクエストごとの照合をO(1)にする
+    cors_origins = frozenset(cors_origins)
+    cors_credentials = cors_config.get('allow_credentials', False)
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 開発環境では全て許可
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=cors_origins,
+    allow_credentials=cors_credentials,
+    allow_methods=cors_methods,
+    allow_headers=cors_headers,
 )
 
 # ツールローダー初期化
@@ -53,42 +84,98 @@ agent = agent_factory.create_agent(
     tool_functions=tool_functions
 )
 
+# ストリーミング設定（deltaフレーム1件あたりの文字数）
+_raw_delta_chunk_size = app_config.get('streaming', {}).get('delta_chunk_size', 64)
+try:
+    delta_chunk_size = int(_raw_delta_chunk_size)
+except (TypeError, ValueError):
+    delta_chunk_size = 0
+
+if delta_chunk_size < 1:
+    logger.warning("Invalid streaming.delta_chunk_size: %r (using 64)", _raw_delta_chunk_size)
+    delta_chunk_size = 64
+
+# DBコネクションプール設定の検証（プールは初回利用時に生成するため、不正値は起動時に検出する）
+get_pool_settings()
+
+# LLMレスポンスキャッシュ（完全一致）
+response_cache = create_response_cache(app_config)
+
+# 静的レスポンス（起動後に変化しないため事前にシリアライズ）
+_ROOT_BODY = orjson.dumps({
+    "app": app_config['app']['name'],
+    "version": app_config['app']['version'],
+    "domain": domain_config['domain']['name'],
+    "agent": agent.name,
+    "tools": len(tools),
+    "status": "running"
+})
+_DOMAIN_CONFIG_BODY = orjson.dumps({
+    "domain": domain_config['domain'],
+    "ui": domain_config.get('ui', {})
+})
+_HEALTH_BASE = {
+    "status": "healthy",
+    "domain": domain_config['domain']['id'],
+    "agent": agent.name
+}
+
 logger.info(f"Active Domain: {domain_config['domain']['name']}")
 logger.info(f"Agent: {agent.name}")
 logger.info(f"Tools loaded: {len(tools)}")
 
 
+# タイムスタンプ文字列キャッシュ（秒単位で再利用）
+_iso_cache = (0, "")
+
+
+def _iso_now() -> str:
+    """現在時刻のISO形式文字列（同一秒内はキャッシュを返す）"""
+    global _iso_cache
+    now = int(time.time())
+    if _iso_cache[0] != now:
+        _iso_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return _iso_cache[1]
+
+
+@app.on_event("startup")
+async def configure_thread_pool():
+    """ツール実行用スレッドプールの上限設定"""
+    # ツール関数（DBアクセス）はブロックするため、
+    # agent.chat_async がスレッドプールで実行する
+    worker_threads = app_config.get('server', {}).get('worker_threads', 32)
+    if isinstance(worker_threads, bool) or not isinstance(worker_threads, int) or worker_threads < 1:
+        raise ValueError(f"server.worker_threads must be an integer >= 1: {worker_threads!r}")
+    
+    anyio.to_thread.current_default_thread_limiter().total_tokens = worker_threads
+    logger.info("Worker threads: %s", worker_threads)
+
+
+@app.on_event("shutdown")
+def shutdown_connection_pools():
+    """DBコネクションプールのクローズ"""
+    close_connection_pools()
+
+
 @app.get("/")
-def root():
+async def root():
     """ルート"""
-    return {
-        "app": app_config['app']['name'],
-        "version": app_config['app']['version'],
-        "domain": domain_config['domain']['name'],
-        "agent": agent.name,
-        "tools": len(tools),
-        "status": "running"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/api/health")
-def health_check():
+async def health_check():
     """ヘルスチェック"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "domain": domain_config['domain']['id'],
-        "agent": agent.name
-    }
+    return ORJSONResponse({
+        **_HEALTH_BASE,
+        "timestamp": _iso_now()
+    })
 
 
 @app.get("/api/config/domain")
-def get_domain_config():
+async def get_domain_config():
     """ドメイン設定取得（Frontend用）"""
-    return {
-        "domain": domain_config['domain'],
-        "ui": domain_config.get('ui', {})
-    }
+    return Response(content=_DOMAIN_CONFIG_BODY, media_type="application/json")
 
 
 @app.post("/api/chat/message")
@@ -100,77 +187,101 @@ async def chat_message(request: dict):
         raise HTTPException(status_code=400, detail="Message is required")
     
     try:
-        result = agent.chat(query)
+        cache_key = response_cache.make_key(agent.instructions, query)
+        result = response_cache.get(cache_key)
+        
+        if result is None:
+            result = await agent.chat_async(query)
+            response_cache.put(cache_key, result)
         
         return {
             "response": result['response'],
             "tool_calls": result.get('tool_calls', []),
             "usage": result.get('usage'),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now()
         }
     except Exception as e:
-        logger.error(f"Chat error: {e}")
-        import traceback
+        logger.error("Chat error: %s", e)
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def send_json_fast(websocket: WebSocket, payload: dict):
+    """orjsonでシリアライズしてテキストフレーム送信"""
+    # Starlette の send_json は標準jsonを使うため、deltaごとのコストを削減する
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+
+async def send_error(websocket: WebSocket, message: str):
+    """エラーフレーム送信"""
+    await send_json_fast(websocket, {"type": "error", "message": message})
+
+
 @app.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
     """チャット（ストリーミング）"""
     # WebSocket接続を受け入れる
     await websocket.accept()
-    logger.info(f"WebSocket connection accepted from {websocket.client}")
+    logger.info("WebSocket connection accepted from %s", websocket.client)
     
     try:
         while True:
             # クライアントからメッセージ受信
-            data = await websocket.receive_json()
+            raw = await websocket.receive_text()
+            try:
+                data = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                await send_error(websocket, "Invalid JSON")
+                continue
+            
+            if not isinstance(data, dict):
+                await send_error(websocket, "Invalid JSON")
+                continue
+            
             query = data.get("message", "")
             
             if not query:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "Message is required"
-                })
+                await send_error(websocket, "Message is required")
                 continue
             
-            logger.info(f"Received message: {query[:50]}...")
+            logger.info("Received message: %s...", query[:50])
             
             try:
-                # エージェント実行
-                result = agent.chat(query)
+                # キャッシュヒット時はLLMを呼ばずにそのまま送信
+                cache_key = response_cache.make_key(agent.instructions, query)
+                result = response_cache.get(cache_key)
+                
+                if result is None:
+                    # エージェント実行（非同期）
+                    result = await agent.chat_async(query)
+                    response_cache.put(cache_key, result)
+                else:
+                    logger.info("Response cache hit")
                 
                 # レスポンスを送信（一括）
                 response_text = result['response']
                 
                 # チャンク分割してストリーミング風に送信
-                chunk_size = 20  # 文字数
-                for i in range(0, len(response_text), chunk_size):
-                    chunk = response_text[i:i+chunk_size]
-                    await websocket.send_json({
+                for i in range(0, len(response_text), delta_chunk_size):
+                    chunk = response_text[i:i+delta_chunk_size]
+                    await send_json_fast(websocket, {
                         "type": "delta",
                         "content": chunk
                     })
                 
                 # 完了通知
-                await websocket.send_json({"type": "done"})
+                await send_json_fast(websocket, {"type": "done"})
                 logger.info("Message processing completed")
                 
             except Exception as e:
-                logger.error(f"Error during message processing: {e}")
-                import traceback
+                logger.error("Error during message processing: %s", e)
                 logger.error(traceback.format_exc())
-                await websocket.send_json({
-                    "type": "error",
-                    "message": str(e)
-                })
+                await send_error(websocket, str(e))
     
     except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected from {websocket.client}")
+        logger.info("WebSocket disconnected from %s", websocket.client)
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-        import traceback
+        logger.error("WebSocket error: %s", e)
         logger.error(traceback.format_exc())
         try:
             await websocket.close(code=1011, reason=str(e))
@@ -184,5 +295,8 @@ if __name__ == "__main__":
         app,
         host="0.0.0.0",
         port=8000,
-        log_level="info"
+        log_level="info",
+        loop="uvloop",
+        http="httptools",
+        ws_per_message_deflate=False  # 短いdeltaフレームでは圧縮コストの方が大きい
     )
\ No newline at end of file
@@ -11,8 +11,15 @@
 import os
 import sys
 from pathlib import Path
+from typing import Dict
 import yaml
 
+# libyaml（Cバインディング）が使える場合は高速なダンパーを使用
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
 
 def create_domain(domain_id: str, domain_name: str):
     """
@@ -73,11 +80,13 @@ def create_domain(domain_id: str, domain_name: str):
         }
     }
     
-    domain_yaml_path = config_dir / "domain.yaml"
-    with open(domain_yaml_path, 'w', encoding='utf-8') as f:
-        yaml.dump(domain_config, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    # 書き込むファイル（全て事前にバイト列へシリアライズし、最後にまとめて書き込む）
+    files: Dict[Path, bytes] = {}
     
-    print(f"✓ Created: {domain_yaml_path}")
+    files[config_dir / "domain.yaml"] = yaml.dump(
+        domain_config, Dumper=SafeDumper, encoding='utf-8',
+        default_flow_style=False, allow_unicode=True, sort_keys=False
+    )
     
     # ========================================
     # 3. prompts.yaml作成
@@ -88,11 +97,10 @@ def create_domain(domain_id: str, domain_name: str):
         'output_format': '## 出力形式\n\n### 標準応答\n1. 質問内容の確認\n2. 回答\n3. 補足情報（必要に応じて）\n'
     }
     
-    prompts_yaml_path = config_dir / "prompts.yaml"
-    with open(prompts_yaml_path, 'w', encoding='utf-8') as f:
-        yaml.dump(prompts_config, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
-    
-    print(f"✓ Created: {prompts_yaml_path}")
+    files[config_dir / "prompts.yaml"] = yaml.dump(
+        prompts_config, Dumper=SafeDumper, encoding='utf-8',
+        default_flow_style=False, allow_unicode=True, sort_keys=False
+    )
     
     # ========================================
     # 4. バックエンドドメインディレクトリ作成
@@ -102,12 +110,9 @@ def create_domain(domain_id: str, domain_name: str):
     domain_backend_dir.mkdir(parents=True, exist_ok=True)
     
     # __init__.py
-    init_file = domain_backend_dir / '__init__.py'
-    init_file.write_text(f'"""\n{domain_name}ドメイン実装\n"""\n', encoding='utf-8')
-    print(f"✓ Created: {init_file}")
+    files[domain_backend_dir / '__init__.py'] = f'"""\n{domain_name}ドメイン実装\n"""\n'.encode('utf-8')
     
     # tools.py（スタブ）
-    tools_file = domain_backend_dir / 'tools.py'
     tools_template = f'''"""
 {domain_name}ツール
 
@@ -180,8 +185,14 @@ def get_tool_functions() -> Dict[str, Any]:
     }}
 '''
     
-    tools_file.write_text(tools_template, encoding='utf-8')
-    print(f"✓ Created: {tools_file}")
+    files[domain_backend_dir / 'tools.py'] = tools_template.encode('utf-8')
+    
+    # ========================================
+    # 5. ファイル書き込み
+    # ========================================
+    for path, content in files.items():
+        path.write_bytes(content)
+        print(f"✓ Created: {path}")
     
     # ========================================
     # 完了メッセージ
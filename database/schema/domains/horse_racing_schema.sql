@@ -1,6 +1,12 @@
 -- 競馬ドメインスキーマ（スキーマ分離対応版）
 -- データベース: knowledge_ai_bot
 -- スキーマ: horse_racing
+--
+-- 既存DB（このファイルの旧版で作成済み）への変更適用は
+-- docs/DATABASE_GUIDE.md「既存データベースへのスキーマ変更の適用」を参照:
+--   ALTER TABLE horse_racing.races ADD UNIQUE (race_name, race_date);
+--   bucket_defs の CREATE TABLE / INSERT（下記、そのまま再実行可能）
+--   idx_hr_results_race を idx_hr_results_race_style に置き換え
 
 -- スキーマ作成
 CREATE SCHEMA IF NOT EXISTS horse_racing;
@@ -23,7 +29,10 @@ CREATE TABLE IF NOT EXISTS horse_racing.races (
     race_class VARCHAR(100),           -- レース条件（例: "サラ系3歳オープン"）
     num_horses INT,                    -- 出走頭数
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    -- 再投入時の重複防止（既存DBへの追加はファイル先頭のコメントを参照）
+    UNIQUE(race_name, race_date)
 );
 
 -- レース結果（詳細）
@@ -128,11 +137,36 @@ CREATE TABLE IF NOT EXISTS horse_racing.elimination_statistics (
     UNIQUE(race_name, condition_type, condition_value)
 );
 
+-- 集計区分定義（区分名と表示順）
+-- 未登録の区分も検索結果には含まれ、表示順は末尾になる
+CREATE TABLE IF NOT EXISTS horse_racing.bucket_defs (
+    kind VARCHAR(50) NOT NULL,         -- prev_pop, prev_finish, running_style
+    condition VARCHAR(100) NOT NULL,   -- 区分名（例: "前走1番人気", "逃げ"）
+    sort_key INT NOT NULL,             -- 表示順
+    
+    PRIMARY KEY(kind, condition)
+);
+
+INSERT INTO horse_racing.bucket_defs (kind, condition, sort_key) VALUES
+    ('prev_pop', '前走1番人気', 1),
+    ('prev_pop', '前走2-3番人気', 2),
+    ('prev_pop', '前走4-6番人気', 3),
+    ('prev_pop', '前走7番人気以下', 4),
+    ('prev_finish', '前走勝利', 1),
+    ('prev_finish', '前走2-3着', 2),
+    ('prev_finish', '前走4-6着', 3),
+    ('prev_finish', '前走7着以下', 4),
+    ('running_style', '逃げ', 1),
+    ('running_style', '先行', 2),
+    ('running_style', '差し', 3),
+    ('running_style', '追込', 4)
+ON CONFLICT (kind, condition) DO NOTHING;
+
 -- インデックス作成
-CREATE INDEX idx_hr_races_name_date ON horse_racing.races(race_name, race_date);
+-- races(race_name, race_date) は UNIQUE 制約のインデックスを使用
 CREATE INDEX idx_hr_races_date ON horse_racing.races(race_date);
 CREATE INDEX idx_hr_races_grade ON horse_racing.races(grade);
-CREATE INDEX idx_hr_results_race ON horse_racing.race_results(race_id);
+CREATE INDEX idx_hr_results_race_style ON horse_racing.race_results(race_id, estimated_running_style);
 CREATE INDEX idx_hr_results_finish ON horse_racing.race_results(finish_position);
 CREATE INDEX idx_hr_results_popularity ON horse_racing.race_results(popularity);
 CREATE INDEX idx_hr_results_style ON horse_racing.race_results(estimated_running_style);